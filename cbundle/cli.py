@@ -2,11 +2,11 @@
 from pathlib import Path
 import os
 import errno
-from typing import Callable, Optional, Union, Any
-from operator import itemgetter
+import stat
+from typing import Annotated, Callable, Iterator, Optional, Union, Any
+from operator import attrgetter, itemgetter
 from itertools import filterfalse
-from functools import partial
-from typing_extensions import Annotated
+from functools import partial, lru_cache
 import sys
 import re
 import shutil
@@ -22,6 +22,14 @@ import typer  # noqa: E402
 # Global Declarations
 
 APP_NAME = 'configbundle'
+LINK_SUFFIX = '.link'
+IGNORED_NAMES = frozenset({'.git', '.gitignore'})
+MULTIPLE_SLASHES = re.compile("/{2,}")
+# Errors of os.copy_file_range which call for a regular copy instead:
+COPY_FALLBACK_ERRNOS = frozenset({errno.ENOSYS, errno.EXDEV, errno.EINVAL,
+                                  errno.EOPNOTSUPP, errno.ETXTBSY})
+# Errors of stat which mean that the path does not exist, as in pathlib:
+STAT_MISSING_ERRNOS = frozenset({errno.ENOENT, errno.ENOTDIR, errno.ELOOP})
 cli = typer.Typer(no_args_is_help=True)
 
 
@@ -46,26 +54,25 @@ class PathsNotRelativeError(ValueError):
 
 def _suffix(file: Path) -> Path:
     """Return FILE with the suffix .link added."""
-    return Path(f"{file}.link")
+    return file.with_name(file.name + LINK_SUFFIX)
 
 
-def _is_suffixed(file: Path) -> bool:
-    """Check if FILE has the suffix .link"""
-    return file.suffix == ".link"
+def _is_suffixed(name: str) -> bool:
+    """Check if the file NAME has the suffix .link"""
+    return name.endswith(LINK_SUFFIX) and name != LINK_SUFFIX
 
 
 def _has_parents(path: Path) -> bool:
     """Check if PATH has parent directories."""
-    return (path.parent == Path('.'))
+    return len(path.parts) > 1
 
 
 def _is_subpath_of(sub: Path, root: Path) -> bool:
-    """Check if P1 is a subpath of p2.
+    """Check if SUB is a subpath of ROOT.
     Both paths must be either relative or absolute."""
-    try:
-        return Path(os.path.commonpath([sub, root])) == root
-    except ValueError:
-        return False
+    _sub = os.path.normpath(sub)
+    _root = os.path.normpath(root)
+    return _sub == _root or _sub.startswith(os.path.join(_root, ''))
 
 
 def _relative_path(path: Path, root: Path | None = None) -> Path:
@@ -75,21 +82,24 @@ def _relative_path(path: Path, root: Path | None = None) -> Path:
     _root = root or get_repo()
     if not _root.is_absolute() or not path.is_absolute():
         raise ValueError("Both PATH and ROOT have to be absolute paths")
-    if path.is_relative_to(_root):
-        _res = path.relative_to(_root)
-    else:
+    # is_relative_to would call relative_to anyways, so do it only once:
+    try:
+        return path.relative_to(_root)
+    except ValueError:
         raise PathsNotRelativeError("PATH is not relative to ROOT")
-    return _res
 
 
 def _relative_name(path: Path, root: Path, prefix: str) -> str:
     """Return a string representing PATH relative to ROOT, with PREFIX added.
     If PATH is not relative to ROOT, return it as an absolute path without PREFIX"""
-    try:
-        _res = f"{prefix}{_relative_path(path, root)}"
-    except PathsNotRelativeError:
-        _res = str(path)
-    return _res
+    # Compare strings, this is only for display and needs no Path objects:
+    _path = str(path)
+    _root = os.path.join(root, '')
+    if _path.startswith(_root):
+        return f"{prefix}{_path[len(_root):]}"
+    if _path == str(root):
+        return f"{prefix}."
+    return _path
 
 
 def _repo_name(path: Path) -> str:
@@ -104,37 +114,48 @@ def _home_name(path: Path) -> str:
     return _relative_name(path, Path.home(), "~/")
 
 
-def assert_path(p: Path,
-                assertion: Callable[[Path], bool],
-                msg: str | None,
-                cancel: bool = True) -> bool:
-    """Check if path P satisfies ASSERTION, exiting if CANCEL is True."""
-    result = assertion(p)
-    if not result:
-        if msg:
-            print(msg.format(p=p))
-        if cancel:
-            raise typer.Exit(1)
-    return result
+def _stat_mode(p: Path, follow_symlinks: bool = True) -> int | None:
+    """Return the file mode of P, or None if P does not exist.
+    Like Path.exists, also treat P as missing if a parent is not a
+    directory or if P is a symlink loop.
+    If FOLLOW_SYMLINKS is False, return the mode of the link itself."""
+    try:
+        return p.stat(follow_symlinks=follow_symlinks).st_mode
+    except OSError as err:
+        if err.errno not in STAT_MISSING_ERRNOS:
+            raise
+        return None
+
 
+def assert_exists(p: Path, follow_symlinks: bool = True) -> int:
+    """Raise an error if P does not exist, else return its file mode.
+    Callers can check the type of P with the mode instead of another stat."""
+    _mode = _stat_mode(p, follow_symlinks=follow_symlinks)
+    if _mode is None:
+        print(f"{p} does not exist")
+        raise typer.Exit(1)
+    return _mode
 
-def assert_exists(p):
-    """Raise an error if P does not exist."""
-    assert_path(p, Path.exists, msg="{p} does not exist")
 
+def assert_is_existing_dir(p: Path) -> None:
+    """Raise an error if P does not exist or is not a directory."""
+    if not stat.S_ISDIR(assert_exists(p)):
+        print(f"{p} is not a directory")
+        raise typer.Exit(1)
 
-def assert_is_dir(p: Path) -> None:
-    """Raise an error if P is not a directory."""
-    assert_path(p, Path.is_dir, msg="{p} is not a directory")
 
-def assert_is_no_symlink(p: Path) -> None:
-    """Raise an error if P is not a symlink."""
-    assert_path(p, lambda x: not Path.is_symlink(x), msg="{p} cannot be a symlink")
+def assert_exists_as_no_symlink(p: Path) -> None:
+    """Raise an error if P does not exist or is a symlink."""
+    if stat.S_ISLNK(assert_exists(p, follow_symlinks=False)):
+        print(f"{p} cannot be a symlink")
+        raise typer.Exit(1)
 
 
 def _sanitize_bundle_arg(bundle_arg: str) -> str:
     """Remove unnecessary characters in BUNDLE_ARG."""
-    _arg = re.sub("/{2,}", "/", bundle_arg)
+    _arg = bundle_arg
+    if "//" in _arg:
+        _arg = MULTIPLE_SLASHES.sub("/", _arg)
     _arg = _arg.lstrip("/")
     if _arg == "" or _arg.isspace():
         print("Bundle specification cannot be empty")
@@ -170,33 +191,72 @@ def _get_bundle_file(bundle_file: str) -> Path:
     return get_repo() / _parse_bundle_file(bundle_file)
 
 
-# NOTE No tests
-def _ignore(file: Path) -> bool:
-    """Return False when file is a bundle file."""
-    res = False
-    res = file.match(".gitignore")
-    res = file.match(".git")
-    return res
+def _ignore(name: str) -> bool:
+    """Return True if the file NAME is not part of a bundle."""
+    return name in IGNORED_NAMES
+
+
+def _walk(root: Path,
+          ignore: Callable[[str], bool] | None = None) -> Iterator[os.DirEntry]:
+    """Recursively yield all directory entries below ROOT.
+    Use the file type information returned by scandir, so that no
+    additional stat calls are needed. Do not follow symlinks.
+    Skip all entries whose name satisfies IGNORE, including the
+    contents of such directories. Like Path.rglob, skip the contents
+    of directories which cannot be read."""
+    _stack = [root]
+    while _stack:
+        try:
+            _entries = os.scandir(_stack.pop())
+        except PermissionError:
+            continue
+        with _entries:
+            for _entry in _entries:
+                if ignore and ignore(_entry.name):
+                    continue
+                yield _entry
+                if _entry.is_dir(follow_symlinks=False):
+                    _stack.append(Path(_entry.path))
+
+
+def _is_empty_dir(path: Path) -> bool:
+    """Check if directory PATH has no entries.
+    Only read the first entry instead of listing the whole directory."""
+    with os.scandir(path) as _entries:
+        return next(_entries, None) is None
 
 
 # NOTE No tests
 def _possibly_bundled_files(bundle_dir: Path) -> list[Path]:
     """Filter out ignored files and backlinks in BUNDLE_DIR (recursing)."""
-    return list(filter(lambda x: not _ignore(x) and not _is_suffixed(x),
-                       bundle_dir.rglob('*')))
+    return [Path(_entry.path) for _entry in _walk(bundle_dir, _ignore)
+            if not _is_suffixed(_entry.name)]
 
-# NOTE No tests
 def _files_first(pathlist: list[Path]) -> list[Path]:
     """Sort PATHLIST with files first."""
     return sorted(pathlist,
-                  key=lambda x: len(x.parts), reverse=True)
+                  key=lambda x: str(x).count(os.sep), reverse=True)
 
 # -----------------------------------------------------------
 # File and dir functions
 
+def _is_dir(p: Path | os.DirEntry) -> bool:
+    """Check if P is a directory, following symlinks.
+    Like Path.is_dir, return False if P is a symlink loop or cannot
+    be accessed otherwise."""
+    try:
+        return p.is_dir()
+    except OSError as err:
+        if err.errno not in STAT_MISSING_ERRNOS:
+            raise
+        return False
+
+
 # NOTE No tests
-def _file_tree(p: Path) -> dict[str, Any]:
+def _file_tree(p: Path | os.DirEntry) -> dict[str, Any]:
     """Recursively build a tree-like dictionary reflecting the contents of P.
+    P can also be a directory entry, as returned by os.scandir; the file
+    type information of the entries is used to avoid stat calls.
 
     Return a dictionary with the following structure:
 
@@ -209,16 +269,22 @@ def _file_tree(p: Path) -> dict[str, Any]:
         'contents': list of entries of that directory
         'target': target of the link
     """
-    _dict: dict[str, Any] = {'path': p,
+    _dict: dict[str, Any] = {'path': Path(p),
                              'name': p.name}
-    if p.is_dir():
+    if _is_dir(p):
         _dict['type'] = 'dir'
-        _dict['contents'] = list(map(_file_tree, p.glob('*')))
+        # Like Path.glob, treat unreadable directories as empty:
+        try:
+            with os.scandir(p) as _entries:
+                _contents = sorted(_entries, key=attrgetter('name'))
+        except PermissionError:
+            _contents = []
+        _dict['contents'] = list(map(_file_tree, _contents))
     else:
         _dict['type'] = 'file'
         if p.is_symlink():
             _dict['type'] = 'link'
-            _dict['target'] = p.readlink()
+            _dict['target'] = Path(os.readlink(p))
     return _dict
 
 
@@ -267,15 +333,86 @@ def _render_tree(entry: dict[str, Any],
     return [str(x) for x in _res]
 
 
+def _repo_exists(repo_path: Path) -> bool:
+    """Check if the repository REPO_PATH exists.
+    Raise an error if REPO_PATH exists, but is not a directory."""
+    _mode = _stat_mode(repo_path)
+    if _mode is None:
+        return False
+    if not stat.S_ISDIR(_mode):
+        print(f"Error: {repo_path} is not a directory, cannot proceed")
+        raise typer.Exit(1)
+    return True
+
+
+@lru_cache(maxsize=1)
 def get_repo() -> Path:
-    """Return the path to the bundle repository, possibly creating it on the fly."""
+    """Return the path to the bundle repository, possibly creating it on the fly.
+    The result is cached, so the checks are only done once per process."""
     repo_path = Path(typer.get_app_dir(APP_NAME))
-    if not repo_path.exists():
+    if not _repo_exists(repo_path):
         repo_path.mkdir(parents=True, exist_ok=True)
-    assert_path(repo_path, Path.is_dir, msg="Error: {p} is not a directory, cannot proceed")
     return repo_path
 
 
+def _move_file(file: Path, target: Path) -> None:
+    """Move FILE to TARGET, which has to be a full file path.
+    Other than shutil.move, do not check if TARGET is a directory.
+    Fall back to shutil.move if TARGET is on another file system."""
+    try:
+        os.rename(file, target)
+    except OSError as err:
+        if err.errno != errno.EXDEV:
+            raise
+        shutil.move(file, target)
+
+
+def _copy_file_range(file: Path, target: Path) -> None:
+    """Copy the contents of FILE to TARGET using os.copy_file_range.
+    Raise an OSError with ENOSYS if the platform does not support it.
+    Check FILE before opening TARGET, so that TARGET is left untouched
+    if FILE cannot be copied."""
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, os.strerror(errno.ENOSYS), f"{file}")
+    # Use plain file descriptors, there is no need for buffered file objects
+    _src = os.open(file, os.O_RDONLY)
+    try:
+        _src_stat = os.fstat(_src)
+        if stat.S_ISDIR(_src_stat.st_mode):
+            raise IsADirectoryError(errno.EISDIR, os.strerror(errno.EISDIR), f"{file}")
+        if not stat.S_ISREG(_src_stat.st_mode):
+            # Let shutil.copyfile deal with special files:
+            raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), f"{file}")
+        _dst = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            _remaining = _src_stat.st_size
+            while _remaining > 0:
+                _copied = os.copy_file_range(_src, _dst, _remaining)
+                if _copied == 0:
+                    # Some file systems silently copy nothing; shutil
+                    # falls back to a regular copy in this case, too:
+                    raise OSError(errno.EINVAL, os.strerror(errno.EINVAL), f"{file}")
+                _remaining -= _copied
+        finally:
+            os.close(_dst)
+    finally:
+        os.close(_src)
+
+
+def _copy_file(file: Path, target: Path) -> None:
+    """Copy FILE to TARGET, including its metadata, like shutil.copy2.
+    If possible, let the kernel copy the data without passing it through
+    user space, which also allows the file system to share the data blocks.
+    TARGET has to be a file path and must not be a link to FILE."""
+    try:
+        _copy_file_range(file, target)
+    except OSError as err:
+        if err.errno not in COPY_FALLBACK_ERRNOS:
+            raise
+        shutil.copyfile(file, target)
+    shutil.copystat(file, target)
+
+
 # REVIEW Add check if bundle_dir exists?
 def _bundle_file(file: Path, bundle_dir: Path) -> Path:
     """Move FILE into BUNDLE_DIR and replace FILE with a link pointing to the bundled file.
@@ -285,13 +422,14 @@ def _bundle_file(file: Path, bundle_dir: Path) -> Path:
     _bundled_file = bundle_dir.absolute() / file.name
     _link_file = _suffix(_bundled_file)
     # FIXME These assertions should be somewhere else
-    if _bundled_file.exists():
+    # Use lexists, since a dangling link also blocks the file name:
+    if os.path.lexists(_bundled_file):
         raise FileAlreadyBundledError(errno.EEXIST, os.strerror(errno.EEXIST), f"{_bundled_file}")
-    if _link_file.exists():
+    if os.path.lexists(_link_file):
         raise FileAlreadyBundledError(errno.EEXIST, os.strerror(errno.EEXIST), f"{_link_file}")
-    shutil.move(str(file), str(_bundled_file))
-    _link_file.symlink_to(file.absolute())
-    file.symlink_to(_bundled_file)
+    _move_file(file, _bundled_file)
+    os.symlink(file.absolute(), _link_file)
+    os.symlink(_bundled_file, file)
     return _bundled_file
 
 
@@ -301,7 +439,7 @@ def _get_associated_target(file: Path) -> Path:
     Do not check whether the target file exists."""
     _backlink = _suffix(file)
     try:
-        _target_file = _backlink.readlink()
+        _target_file = Path(os.readlink(_backlink))
     except FileNotFoundError as err:
         raise NoBacklinkError(errno.ENOENT, f"File {file} has no backlink file", err.filename)
     except OSError as err:
@@ -315,11 +453,11 @@ def _restore_copy(bundled_file: Path, overwrite: bool) -> Path:
     If OVERWRITE is True, overwrite existing files, else raise an error.
     Return the Path to the restored file."""
     _target_file = _get_associated_target(bundled_file)
-    if not overwrite and _target_file.exists():
+    if not overwrite and os.path.lexists(_target_file):
         raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), f"{_target_file}")
     # Delete target to avoid symlink looping
     _target_file.unlink(missing_ok=True)
-    shutil.copy2(str(bundled_file), str(_target_file))
+    _copy_file(bundled_file, _target_file)
     return _target_file
 
 
@@ -328,10 +466,10 @@ def _restore_as_link(bundled_file: Path, overwrite: bool) -> Path:
     If OVERWRITE is True, overwrite existing files, else raise an error.
     Return the Path to the link file."""
     _target_file = _get_associated_target(bundled_file)
-    if not overwrite and _target_file.exists():
-        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), f"{_target_file}")
-    _target_file.unlink(missing_ok=True)
-    _target_file.symlink_to(bundled_file.absolute())
+    if overwrite:
+        _target_file.unlink(missing_ok=True)
+    # Without OVERWRITE, symlink raises FileExistsError on an existing target
+    os.symlink(bundled_file.absolute(), _target_file)
     return _target_file
 
 
@@ -340,7 +478,7 @@ def _restore_dry_run(bundled_file: Path, overwrite: bool) -> Path:
     """Only simulate restoring (copy).
     Check for files, but do nothing with them."""
     _target_file = _get_associated_target(bundled_file)
-    if not overwrite and _target_file.exists():
+    if not overwrite and os.path.lexists(_target_file):
         raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), f"{_target_file}")
     return _target_file
 
@@ -366,11 +504,19 @@ def _act_on_path(path: Path,
 
 
 def _act_on_paths(paths: list[Path],
-                  action_fn: Callable[[Path], Path]) -> list[dict]:
+                  action_fn: Callable[[Path], Path],
+                  concurrent: bool = False) -> list[dict]:
     """Act on each path in PATHS for side-effects and store the results.
     Return a list of dicts with the path name and the the result or the
     error code, respectively. The value 'success' stores whether an error
-    occured or not."""
+    occured or not.
+    If CONCURRENT is True, act on the paths using a thread pool. Only use
+    this if ACTION_FN does not depend on the order of the paths."""
+    if concurrent:
+        # Imported here since it takes noticeable time on startup:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor() as _executor:
+            return list(_executor.map(partial(_act_on_path, action_fn=action_fn), paths))
     return [_act_on_path(p, action_fn) for p in paths]
 
 
@@ -385,7 +531,9 @@ def _restore_dir_copy(bundle_dir: Path, overwrite: bool) -> list[dict]:
     """Restore (copy) all files bundled in BUNDLE_DIR and subdirectories."""
     def _restore_fn(p: Path) -> Path:
         return _restore_copy(p, overwrite)
-    return _act_on_paths(_possibly_bundled_files(bundle_dir), _restore_fn)
+    # Each file is copied to its own target, so order does not matter:
+    return _act_on_paths(_possibly_bundled_files(bundle_dir), _restore_fn,
+                         concurrent=True)
 
 
 # NOTE No tests
@@ -407,18 +555,20 @@ def _restore_dir_dry_run(bundle_dir: Path, overwrite: bool) -> list[dict]:
 def _removable(result_list: list[dict]) -> list[Path]:
     """Return all paths with successful action which do not contain a failed path."""
     _successes, _failures = _split_results(result_list)
-    _files = list(map(itemgetter("path"), _successes))
+    _blocked: set[Path] = set()
     for _path in map(itemgetter("path"), _failures):
-        _files = [x for x in _files if x not in _path.parents]
-    return _files
+        _blocked.update(_path.parents)
+    return [x for x in map(itemgetter("path"), _successes) if x not in _blocked]
 
 
 def _rm_file_and_backlink(bundled_file: Path) -> None:
     """Remove the bundle file and its associated backlink file.
     Do not raise an error if no file is found."""
-    _backlink = _suffix(bundled_file)
-    bundled_file.unlink(missing_ok=True)
-    _backlink.unlink(missing_ok=True)
+    for _file in (bundled_file, _suffix(bundled_file)):
+        try:
+            os.unlink(_file)
+        except FileNotFoundError:
+            pass
 
 
 # -----------------------------------------------------------
@@ -430,8 +580,7 @@ def add(file: Path,
         bundle_dir: Annotated[Optional[str],
                               typer.Argument(help="Bundle directory path (relative to the repository)")] = None) -> None:
     "Add FILE to BUNDLE_DIR, replacing it with a link to the bundled file."
-    assert_exists(file)
-    assert_is_no_symlink(file)
+    assert_exists_as_no_symlink(file)
     _dir = _get_bundle_dir(bundle_dir)
     _dir.mkdir(parents=True, exist_ok=True)
     try:
@@ -441,17 +590,21 @@ def add(file: Path,
         raise typer.Exit(1)
 
 
-# NOTE No tests
 @cli.command()
 def copy(bundle_file: str, target_file: Path) -> None:
     """Copy BUNDLE_FILE to TARGET_FILE."""
     _bundled_file = _get_bundle_file(bundle_file)
-    assert_exists(_bundled_file)
-    if target_file.exists():
-        typer.confirm(f"File {target_file} already exists, overwrite? ",
-                      default=False, abort=True)
+    # A missing bundled file is reported by the copy itself
+    if target_file.is_dir():
+        target_file = target_file / _bundled_file.name
     try:
-        shutil.copy2(str(_bundled_file), str(target_file))
+        if target_file.exists():
+            # _copy_file would truncate the bundled file in this case:
+            if target_file.samefile(_bundled_file):
+                raise shutil.SameFileError(f"{target_file} is the bundled file {_repo_name(_bundled_file)}")
+            typer.confirm(f"File {target_file} already exists, overwrite? ",
+                          default=False, abort=True)
+        _copy_file(_bundled_file, target_file)
     except OSError as err:
         print(err)
         raise typer.Exit(1)
@@ -468,9 +621,9 @@ def restore(bundle_file: str,
                               typer.Option(help="Delete bundled file after restoring target")] = False) -> None:
     """Copy BUNDLE_FILE to the location defined by its associated .link file."""
     _bundled_file = _get_bundle_file(bundle_file)
-    assert_exists(_bundled_file)
-    if _bundled_file.is_dir():
+    if stat.S_ISDIR(assert_exists(_bundled_file)):
         print(f"{_bundled_file} must be a file. To restore whole directories, use unbundle")
+        raise typer.Exit(1)
     if remove and as_link:
         print("Option --remove cannot be used when restoring as a link")
         raise typer.Exit(1)
@@ -500,24 +653,35 @@ def rm(bundle_file: str,
                                      help="Do not ask for confirmation")] = False) -> None:
     """Remove BUNDLE_FILE and its associated link."""
     _bundled_file = _get_bundle_file(bundle_file)
-    assert_exists(_bundled_file)
     _backlink_file = _suffix(_bundled_file)
     # Create explicit warning if --force is not set:
     if not force:
+        assert_exists(_bundled_file)
+        # A single readlink tells us both whether there is a backlink
+        # and where it points to:
         _backlink_warning = ''
-        if _backlink_file.exists():
-            _backlink_warning = " and its associated backlink"
         _target_warning = ''
         try:
             _target_file = _get_associated_target(_bundled_file)
+            _backlink_warning = " and its associated backlink"
         except NoBacklinkError:
             _target_file = None
+            if os.path.lexists(_backlink_file):
+                _backlink_warning = " and its associated backlink"
         if _target_file and _target_file.is_symlink():
             _target_warning = f" This will break the link stored in {_home_name(_target_file)}"
         msg = f"Delete {_repo_name(_bundled_file)}{_backlink_warning}?{_target_warning}"
         typer.confirm(msg, default=False, abort=True)
+    # Let unlink report missing files instead of checking beforehand:
+    try:
+        _bundled_file.unlink()
+    except (FileNotFoundError, NotADirectoryError):
+        print(f"{_bundled_file} does not exist")
+        raise typer.Exit(1)
+    except IsADirectoryError:
+        print(f"{_repo_name(_bundled_file)} is a directory. To delete directories, use rmdir")
+        raise typer.Exit(1)
     _backlink_file.unlink(missing_ok=True)
-    _bundled_file.unlink()
 
 
 @cli.command()
@@ -527,11 +691,11 @@ def rmdir(bundle_dir: str,
                                         help="Delete non-empty dirs")] = False) -> None:
     """Delete bundle directory BUNDLE_DIR and all of its subdirectories."""
     _dir = _get_bundle_dir(bundle_dir)
-    assert_exists(_dir)
-    if list(_dir.glob("*")) and not force:
+    assert_is_existing_dir(_dir)
+    if not force and not _is_empty_dir(_dir):
         print(f"{_repo_name(_dir)} is not empty. Use --force to delete anyways")
         raise typer.Exit(1)
-    shutil.rmtree(str(_dir))
+    shutil.rmtree(_dir)
 
 
 # TODO HEREAMI
@@ -552,7 +716,7 @@ def unbundle(bundle_dir: Annotated[Optional[str],
                       default=False, abort=True)
 
     _bundle_dir = _get_bundle_dir(bundle_dir)
-    print(list(_bundle_dir.rglob('*')))
+    assert_is_existing_dir(_bundle_dir)
     _results = _restore_dir_copy(_bundle_dir, overwrite=True)
 #    _results = _restore_dir_dry_run(_bundle_dir, True)
     _restored, _failed = _split_results(_results)
@@ -568,7 +732,7 @@ def unbundle(bundle_dir: Annotated[Optional[str],
         if not _path.is_dir():
             _rm_file_and_backlink(_path)
         else:
-            if list(_path.glob('*')):
+            if not _is_empty_dir(_path):
                 print(" - directory not empty, skipping")
                 raise typer.Exit(1)
             else:
@@ -581,30 +745,31 @@ def unbundle(bundle_dir: Annotated[Optional[str],
 def destroy() -> None:
     """Delete the repository and its containing directory."""
     _repo_dir = Path(typer.get_app_dir(APP_NAME))
-    if not _repo_dir.exists():
+    if not _repo_exists(_repo_dir):
         print("There is no repository to delete")
         raise typer.Exit(1)
-    assert_path(_repo_dir, Path.is_dir, msg="Error: {p} is not a directory, cannot proceed")
     typer.confirm(f"Delete the repository at {_repo_dir} and everything it contains?",
                   default=False, abort=True)
-    shutil.rmtree(str(_repo_dir))
+    shutil.rmtree(_repo_dir)
+    # The cached repository path is gone now:
+    get_repo.cache_clear()
 
 
-# TODO Implement tree instead of calling external binary
 @cli.command()
 def ls(bundle_dir: Annotated[Optional[str], typer.Argument()] = None) -> None:
     """Display the contents of BUNDLE_DIR.
     If no bundle dir is given, list the repository root."""
     _dir = _get_bundle_dir(bundle_dir)
-    assert_exists(_dir)
-    assert_is_dir(_dir)
+    # get_repo has already checked the repository root itself
+    if bundle_dir:
+        assert_is_existing_dir(_dir)
     try:
         _list = _file_tree(_dir)
     except OSError as err:
         print(err)
         raise typer.Exit(1)
-    for _line in _render_tree(_list):
-        print(_line)
+    # Write the whole tree at once instead of line by line
+    print("\n".join(_render_tree(_list)))
 
 
 if __name__ == '__main__':
@@ -109,6 +109,28 @@ def test_sanitize_bundle_arg():
     assert cb._sanitize_bundle_arg("/dir/") == "dir/"
 
 
+def test_is_suffixed():
+    assert cb._is_suffixed("file.conf.link")
+    assert not cb._is_suffixed("file.conf")
+    assert not cb._is_suffixed(".link")
+
+
+def test_has_parents():
+    assert not cb._has_parents(Path("file"))
+    assert not cb._has_parents(Path("/"))
+    assert cb._has_parents(Path("dir/file"))
+    assert cb._has_parents(Path("/file"))
+
+
+def test_is_subpath_of():
+    assert cb._is_subpath_of(Path("/root/dir/file"), Path("/root/dir"))
+    assert cb._is_subpath_of(Path("/root/dir"), Path("/root/dir"))
+    assert cb._is_subpath_of(Path("/root/dir"), Path("/"))
+    assert cb._is_subpath_of(Path("dir/file"), Path("dir"))
+    assert not cb._is_subpath_of(Path("/root/dirfile"), Path("/root/dir"))
+    assert not cb._is_subpath_of(Path("dir/file"), Path("/dir"))
+
+
 # Note _parse_bundle_dir is just wrapping Path(), no need for a test
 
 def test_parse_bundle_file():
@@ -139,6 +161,12 @@ class TestRelativePath:
         p = Path.home() / req_bundlefile_strings
         assert cb._home_name(p) == f"~/{req_bundlefile_strings}"
 
+    def test_relative_name(self, req_bundlefile_strings):
+        p = Path("/root/dir") / req_bundlefile_strings
+        assert cb._relative_name(p, Path("/root/dir"), "/") == f"/{req_bundlefile_strings}"
+        assert cb._relative_name(p, Path("/root/d"), "/") == str(p)
+        assert cb._relative_name(p, Path("/"), "/") == str(p)
+
 
 def test_get_bundle_file(empty_repo, req_bundlefile_strings):
     assert cb._get_bundle_file(req_bundlefile_strings) == Path(empty_repo) / req_bundlefile_strings
@@ -147,19 +175,113 @@ def test_get_bundle_file(empty_repo, req_bundlefile_strings):
 def test_get_bundle_dir(empty_repo, req_bundledir_strings):
     assert cb._get_bundle_dir(req_bundledir_strings) == _add_if_not_none(empty_repo, req_bundledir_strings)
 
+def test_assert_is_existing_dir(empty_dir):
+    cb.assert_is_existing_dir(empty_dir)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_is_existing_dir(empty_dir / "non-existing-dir")
+    _file = empty_dir / "a_file"
+    _write_dummy_content(_file)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_is_existing_dir(_file)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_is_existing_dir(_file / "sub")
+    _loop = empty_dir / "loop"
+    _loop.symlink_to(_loop)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_is_existing_dir(_loop)
+
+
+def test_assert_exists_as_no_symlink(test_file, empty_dir):
+    cb.assert_exists_as_no_symlink(test_file)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_exists_as_no_symlink(empty_dir / "non-existing-file")
+    _link = empty_dir / "link"
+    _link.symlink_to(test_file)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_exists_as_no_symlink(_link)
+    with pytest.raises(click.exceptions.Exit):
+        cb.assert_exists_as_no_symlink(test_file / "sub")
+
+
 def test_get_repo(monkeypatch, empty_dir):
+    cb.get_repo.cache_clear()
     monkeypatch.setattr(typer, "get_app_dir", lambda _: empty_dir)
     assert cb.get_repo() == empty_dir
     new_dir = empty_dir / "new"
     monkeypatch.setattr(typer, "get_app_dir", lambda _: new_dir)
+    # Result is cached:
+    assert cb.get_repo() == empty_dir
+    cb.get_repo.cache_clear()
     assert cb.get_repo() == new_dir
     assert new_dir.exists()
     assert new_dir.is_dir()
     a_file = empty_dir / "a_file"
     _write_dummy_content(a_file)
     monkeypatch.setattr(typer, "get_app_dir", lambda _: a_file)
+    cb.get_repo.cache_clear()
     with pytest.raises(click.exceptions.Exit):
         cb.get_repo()
+    cb.get_repo.cache_clear()
+
+
+def test_walk(empty_dir):
+    _subdir = empty_dir / "subdir"
+    _subdir.mkdir()
+    _write_dummy_content(empty_dir / "file")
+    _write_dummy_content(_subdir / "file")
+    (empty_dir / "link").symlink_to(_subdir)
+    _paths = sorted(Path(_entry.path) for _entry in cb._walk(empty_dir))
+    assert _paths == sorted([_subdir,
+                             _subdir / "file",
+                             empty_dir / "file",
+                             empty_dir / "link"])
+
+
+def test_walk_ignore(empty_dir):
+    _git_dir = empty_dir / ".git"
+    _git_dir.mkdir()
+    _write_dummy_content(_git_dir / "config")
+    _write_dummy_content(empty_dir / ".gitignore")
+    _write_dummy_content(empty_dir / "file")
+    _paths = [Path(_entry.path) for _entry in cb._walk(empty_dir, cb._ignore)]
+    assert _paths == [empty_dir / "file"]
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can read any directory")
+def test_walk_unreadable(empty_dir):
+    _subdir = empty_dir / "subdir"
+    _subdir.mkdir()
+    _write_dummy_content(_subdir / "file")
+    _subdir.chmod(0o000)
+    try:
+        _paths = [Path(_entry.path) for _entry in cb._walk(empty_dir)]
+    finally:
+        _subdir.chmod(0o700)
+    assert _paths == [_subdir]
+
+
+def test_copy_file(test_file, empty_dir, monkeypatch):
+    test_file.chmod(0o600)
+    _target = empty_dir / "copy"
+    cb._copy_file(test_file, _target)
+    assert _target.read_text() == test_file.read_text()
+    assert _target.stat().st_mode == test_file.stat().st_mode
+    # Fall back to a regular copy if copy_file_range copies nothing:
+    _target.unlink()
+    monkeypatch.setattr(os, "copy_file_range", lambda *args: 0, raising=False)
+    cb._copy_file(test_file, _target)
+    assert _target.read_text() == test_file.read_text()
+    # Fall back to a regular copy if copy_file_range is not available:
+    _target.unlink()
+    monkeypatch.delattr(os, "copy_file_range", raising=False)
+    cb._copy_file(test_file, _target)
+    assert _target.read_text() == test_file.read_text()
+
+
+def test_is_empty_dir(empty_dir):
+    assert cb._is_empty_dir(empty_dir)
+    _write_dummy_content(empty_dir / "file")
+    assert not cb._is_empty_dir(empty_dir)
 
 
 class TestBundleFile:
@@ -185,6 +307,14 @@ class TestBundleFile:
             cb._bundle_file(test_file, empty_dir)
 
 
+    def test_dangling_backlink(self, test_file, empty_dir):
+        cb._suffix(empty_dir / test_file.name).symlink_to(empty_dir / "non-existing-file")
+        with pytest.raises(cb.FileAlreadyBundledError):
+            cb._bundle_file(test_file, empty_dir)
+        assert test_file.exists()
+        assert not test_file.is_symlink()
+
+
 def test_get_associated_target(test_file, empty_dir):
     _bundled_file = cb._bundle_file(test_file, empty_dir)
     assert cb._get_associated_target(_bundled_file) == test_file
@@ -285,6 +415,16 @@ def test_act_on_paths_success():
     assert all(entry['success'] for entry in _result)
 
 
+def test_act_on_paths_concurrent():
+    def _action_fn(p):
+        return p
+
+    _paths = [Path(x) for x in ["/a", "directory", "a/bba", "very/nested/stuff"]]
+    _result = cb._act_on_paths(_paths, _action_fn, concurrent=True)
+
+    assert _result == cb._act_on_paths(_paths, _action_fn)
+
+
 def test_split_results():
 
     def _action_fn(p):
@@ -304,6 +444,17 @@ def test_split_results():
     assert not any([entry['success'] for entry in _failures])
 
 
+def test_files_first():
+    _paths = list(map(Path, ["/config/dir",
+                             "/config/dir/subdir/file",
+                             "/config/file",
+                             "/config/dir/subdir"]))
+    assert cb._files_first(_paths) == list(map(Path, ["/config/dir/subdir/file",
+                                                      "/config/dir/subdir",
+                                                      "/config/dir",
+                                                      "/config/file"]))
+
+
 def test_removable():
     def _fail(p):
         def _action_fn(p):
@@ -405,6 +556,54 @@ class TestCMDAdd:
         with pytest.raises(click.exceptions.Exit):
             cb.add(self.file, self.cmd_bundle_dir)
 
+    def test_parent_is_file(self, setup):
+        result = runner.invoke(cb.cli, ["add", str(self.file / "sub")])
+        assert result.exit_code == 1
+        assert "does not exist" in result.output
+
+
+class TestCMDCopy:
+
+    bundled_file: Path
+    target_file: Path
+    cmd_bundle_file: str
+
+    @pytest.fixture
+    def setup(self, empty_repo, test_file):
+        self.bundled_file = cb._bundle_file(test_file, empty_repo)
+        self.target_file = test_file
+        self.cmd_bundle_file = test_file.name
+
+    def test_copy(self, setup, empty_dir):
+        _target = empty_dir / "copy"
+        cb.copy(self.cmd_bundle_file, _target)
+        assert _target.read_text() == self.bundled_file.read_text()
+
+    def test_copy_into_dir(self, setup, tmp_path):
+        cb.copy(self.cmd_bundle_file, tmp_path)
+        assert (tmp_path / self.bundled_file.name).exists()
+
+    def test_file_not_found(self, setup, empty_dir):
+        with pytest.raises(click.exceptions.Exit):
+            cb.copy("non-existing-file", empty_dir / "copy")
+
+    def test_refuse_directory(self, setup, empty_repo, empty_dir):
+        (empty_repo / "a_dir").mkdir()
+        _target = empty_dir / "copy"
+        _write_dummy_content(_target)
+        _contents = _target.read_text()
+        result = runner.invoke(cb.cli, ["copy", "a_dir", str(_target)],
+                               input="y\n")
+        assert result.exit_code == 1
+        assert _target.read_text() == _contents
+        assert not (_target / "a_dir").exists()
+
+    def test_refuse_copy_onto_link(self, setup):
+        _contents = self.bundled_file.read_text()
+        with pytest.raises(click.exceptions.Exit):
+            cb.copy(self.cmd_bundle_file, self.target_file)
+        assert self.bundled_file.read_text() == _contents
+
 
 class TestCMDRestore:
 
@@ -439,6 +638,21 @@ class TestCMDRestore:
             cb.restore(self.cmd_arg, as_link=False, overwrite=False, remove=False)
 
 
+    def test_cmd_restore_dir(self, setup):
+        with pytest.raises(click.exceptions.Exit):
+            cb.restore(str(Path(self.cmd_arg).parent), as_link=False, overwrite=True, remove=False)
+
+
+    def test_cmd_restore_not_existing(self, setup):
+        with pytest.raises(click.exceptions.Exit):
+            cb.restore(f"{self.cmd_arg}/sub", as_link=False, overwrite=True, remove=False)
+        _loop = self.bundle_dir / "loop"
+        _loop.symlink_to(_loop)
+        with pytest.raises(click.exceptions.Exit):
+            cb.restore(str(Path(self.cmd_arg).with_name("loop")),
+                       as_link=False, overwrite=True, remove=False)
+
+
     def test_cmd_restore_remove(self, setup):
         # Overwrite target and remove bundled file:
         cb.restore(self.cmd_arg, as_link=False, overwrite=True, remove=True)
@@ -482,6 +696,15 @@ class TestCMDRm:
     def test_file_not_found(self, setup):
         with pytest.raises(click.exceptions.Exit):
             cb.rm("non-existing-file", force=True)
+        with pytest.raises(click.exceptions.Exit):
+            cb.rm(f"{self.cmd_bundle_file}/sub", force=True)
+        assert self.bundled_file.exists()
+
+    def test_refuse_directory(self, setup, empty_repo):
+        (empty_repo / "a_dir").mkdir()
+        with pytest.raises(click.exceptions.Exit):
+            cb.rm("a_dir", force=True)
+        assert (empty_repo / "a_dir").exists()
 
     def test_ask_user_per_default(self, setup):
         result = runner.invoke(cb.cli, "rm " + self.cmd_bundle_file,
@@ -546,6 +769,13 @@ class TestCMDRmdir:
         assert result.exit_code == 0
         assert not self.bundle_dir.exists()
 
+    def test_parent_is_file(self, setup):
+        _arg = f"{self.cmd_bundle_dir}/{self.bundled_file.name}/sub"
+        result = runner.invoke(cb.cli, ["rmdir", _arg, "--force"])
+        assert result.exit_code == 1
+        assert "does not exist" in result.output
+        assert self.bundled_file.exists()
+
 
 class TestCMDUnbundle:
 
@@ -586,10 +816,62 @@ class TestCMDUnbundle:
         assert self.bundle_dir.exists()
         assert self.target_file.is_symlink()
 
+    def test_bundle_dir_missing(self, setup):
+        result = runner.invoke(cb.cli, ["unbundle", "non-existing-dir"])
+        assert result.exit_code == 1
+        assert "does not exist" in result.output
+        result = runner.invoke(cb.cli, ["unbundle", f"{self.cmd_bundle_dir}/{self.bundled_file.name}"])
+        assert result.exit_code == 1
+        assert "not a directory" in result.output
+        assert self.bundled_file.exists()
+
 
 
-def test_cmd_destroy(test_file, empty_dir):
-    pass
+def test_cmd_ls(empty_repo, test_file):
+    _bundle_dir = empty_repo / "bundle_dir"
+    _bundle_dir.mkdir()
+    cb._bundle_file(test_file, _bundle_dir)
+    result = runner.invoke(cb.cli, ["ls"])
+    assert result.exit_code == 0
+    _lines = result.output.splitlines()
+    assert len(_lines) == 4
+    assert _lines[1].endswith("bundle_dir/")
+    assert _lines[2].endswith(test_file.name)
+    assert _lines[3].endswith(f"{test_file.name}.link -> {test_file}")
+    result = runner.invoke(cb.cli, ["ls", "non-existing-dir"])
+    assert result.exit_code == 1
+    result = runner.invoke(cb.cli, ["ls", f"bundle_dir/{test_file.name}/sub"])
+    assert result.exit_code == 1
+    assert "does not exist" in result.output
+    (empty_repo / "loop").symlink_to(empty_repo / "loop")
+    result = runner.invoke(cb.cli, ["ls", "loop"])
+    assert result.exit_code == 1
+    assert "does not exist" in result.output
+    # A symlink loop within the tree is listed as a link:
+    result = runner.invoke(cb.cli, ["ls"])
+    assert result.exit_code == 0
+    assert result.output.splitlines()[-1].endswith(f"loop -> {empty_repo / 'loop'}")
+
+
+def test_cmd_destroy(monkeypatch, test_file, empty_dir):
+    _repo_dir = empty_dir / "repo"
+    monkeypatch.setattr(typer, "get_app_dir", lambda _: _repo_dir)
+    result = runner.invoke(cb.cli, ["destroy"])
+    assert result.exit_code == 1
+    _write_dummy_content(_repo_dir)
+    result = runner.invoke(cb.cli, ["destroy"])
+    assert result.exit_code == 1
+    assert "not a directory" in result.output
+    _repo_dir.unlink()
+    _repo_dir.symlink_to(_repo_dir)
+    result = runner.invoke(cb.cli, ["destroy"])
+    assert result.exit_code == 1
+    assert "no repository" in result.output
+    _repo_dir.unlink()
+    _repo_dir.mkdir()
+    result = runner.invoke(cb.cli, ["destroy"], input="y\n")
+    assert result.exit_code == 0
+    assert not _repo_dir.exists()
 
 
 def test_cmd_path():